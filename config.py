@@ -17,4 +17,22 @@ class EmailSettings:
         if not all([cls.SMTP_USERNAME, cls.SMTP_PASSWORD, cls.RECIPIENTS]):
             raise ValueError("Missing email configuration in .env file")
 
-email_settings = EmailSettings()
\ No newline at end of file
+class InferenceSettings:
+    MODEL_PATH = os.getenv('MODEL_PATH', 'weights/yolov9-t.onnx')
+    CLASS_MAPPING_PATH = os.getenv('CLASS_MAPPING_PATH', 'weights/metadata.yaml')
+    DEVICE = os.getenv('INFERENCE_DEVICE', 'CPU')
+    # 0 keeps detection in the Flask process; >0 starts a worker pool
+    WORKERS = int(os.getenv('INFERENCE_WORKERS', 0))
+    RING_SLOTS = int(os.getenv('INFERENCE_RING_SLOTS', 0)) or 2 * max(WORKERS, 1)
+    MAX_FRAME_WIDTH = int(os.getenv('MAX_FRAME_WIDTH', 1920))
+    MAX_FRAME_HEIGHT = int(os.getenv('MAX_FRAME_HEIGHT', 1080))
+    # Seconds to wait for every worker to load and warm its model
+    WORKER_STARTUP_TIMEOUT = float(os.getenv('WORKER_STARTUP_TIMEOUT', 120))
+
+class RegionSettings:
+    # Per-source regions of interest and exclusion zones
+    REGIONS_PATH = os.getenv('REGIONS_PATH', 'regions.json')
+
+email_settings = EmailSettings()
+inference_settings = InferenceSettings()
+region_settings = RegionSettings()
\ No newline at end of file
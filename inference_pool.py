@@ -0,0 +1,411 @@
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import defaultdict
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger('wildlife_inference')
+
+
+def _worker_main(worker_id, shm_name, num_slots, slot_bytes, tasks, results,
+                 model_path, class_mapping_path, device):
+    """
+    Worker process entry point.
+
+    Each worker owns its own YOLOv9 session, reads frames straight out of the
+    shared ring slots, draws the detections in place and reports back over the
+    result queue. Only the slot index, the source's regions and the detection
+    list are pickled. Messages are (kind, worker_id, payload) tuples; 'ready'
+    is sent once the model is loaded and warmed, 'error' if that failed.
+    """
+    try:
+        # Imported here so the parent process does not need onnxruntime loaded
+        from yolov9 import YOLOv9
+
+        detector = YOLOv9(model_path=model_path,
+                          class_mapping_path=class_mapping_path,
+                          device=device)
+
+        # Frames from different workers are shown in turn, so every worker
+        # needs the same colour per class
+        detector.color_palette = np.random.default_rng(0).uniform(
+            0, 255, size=(len(detector.classes), 3))
+
+        # Push a blank frame through so the first real frame is not slow
+        blank = np.zeros((480, 640, 3), dtype=np.uint8)
+        detector.image_height, detector.image_width = blank.shape[:2]
+        detector.detect(blank)
+    except Exception as e:
+        results.put(('error', worker_id, str(e)))
+        return
+    results.put(('ready', worker_id, None))
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((num_slots, slot_bytes), dtype=np.uint8, buffer=shm.buf)
+
+    frame = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            source, seq, slot, shape, regions = task
+            frame = ring[slot, :int(np.prod(shape))].reshape(shape)
+            detections = []
+            try:
+                if regions is None:
+                    crop, offset = frame, (0, 0)
+                else:
+                    crop, offset = regions.crop(frame)
+                detector.image_height, detector.image_width = crop.shape[:2]
+                for det in detector.detect(crop):
+                    # Only animals are drawn, so only animals are reported
+                    if not detector.is_animal(det['class_index']):
+                        continue
+                    detections.append({
+                        'species': det['class_name'],
+                        'class_index': int(det['class_index']),
+                        'confidence': float(det['confidence']),
+                        'box': det['box'],
+                    })
+                if regions is not None:
+                    detections = regions.map_detections(
+                        detections, offset, crop.shape[1::-1], shape[1::-1])
+                for det in detections:
+                    det['box'] = np.asarray(det['box'])
+                detector.draw_detections(frame, detections)
+            except Exception as e:
+                # Always answer so in-order delivery for this source never stalls,
+                # but half-processed detections are not trustworthy
+                logger.error(f"Inference error on {source}#{seq}: {e}")
+                detections = []
+
+            for det in detections:
+                det['box'] = [int(v) for v in det['box']]
+            results.put(('result', worker_id, (source, seq, slot, detections)))
+    finally:
+        del frame, ring
+        shm.close()
+
+
+class InferencePool:
+    """
+    Pool of inference worker processes fed through shared-memory frame slots.
+
+    Frames are copied once into a ring of fixed-size slots in a single
+    SharedMemory block; workers read and annotate them in place, so no frame
+    is ever pickled. The number of slots bounds the frames in flight: submit()
+    waits for a free slot and gives up after `timeout`, which lets the caller
+    drop frames instead of queueing unbounded work. Results are re-ordered
+    per source, so each source sees its frames back in submission order.
+
+    Each worker has its own task queue so the pool knows which frames a worker
+    holds. If a worker dies its slots are reclaimed, its frames are skipped in
+    the ordering and the worker is restarted with an increasing delay while the
+    remaining workers keep delivering.
+    """
+
+    RESTART_BACKOFF = 1.0
+    MAX_RESTART_BACKOFF = 60.0
+
+    def __init__(self,
+                 model_path: str,
+                 class_mapping_path: str,
+                 num_workers: int,
+                 num_slots: Optional[int] = None,
+                 max_frame_size: Tuple[int, int] = (1920, 1080),
+                 device: str = "CPU",
+                 max_pending: Optional[int] = None) -> None:
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+
+        self.num_workers = num_workers
+        self.num_slots = num_slots or 2 * num_workers
+        self.max_pending = max_pending or 2 * self.num_slots
+        self.max_frame_size = max_frame_size
+        max_width, max_height = max_frame_size
+        self.slot_bytes = max_width * max_height * 3
+
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self.slot_bytes * self.num_slots)
+        self._ring = np.ndarray((self.num_slots, self.slot_bytes),
+                                dtype=np.uint8, buffer=self._shm.buf)
+
+        # Slots are handed out and reclaimed by the parent only
+        self._free_slots = queue.Queue()
+        for slot in range(self.num_slots):
+            self._free_slots.put(slot)
+
+        # onnxruntime sessions are not fork-safe, so always spawn
+        self._ctx = mp.get_context("spawn")
+        self._results = self._ctx.Queue()
+        self._model_args = (model_path, class_mapping_path, device)
+
+        self._lock = threading.Lock()
+        self._closed = False
+        self._next_seq: Dict[str, int] = defaultdict(int)
+        self._expected_seq: Dict[str, int] = defaultdict(int)
+        # A None entry marks a frame lost with a dead worker
+        self._pending: Dict[str, Dict[int, Optional[Tuple[np.ndarray, List]]]] = defaultdict(dict)
+        self._slot_shapes: Dict[int, Tuple[int, ...]] = {}
+
+        self._workers = [None] * num_workers
+        self._task_queues = [None] * num_workers
+        self._in_flight: List[Dict[Tuple[str, int], int]] = [{} for _ in range(num_workers)]
+        self._worker_ready = [False] * num_workers
+        self._restart_at: List[Optional[float]] = [None] * num_workers
+        self._backoff = [self.RESTART_BACKOFF] * num_workers
+        # Last load failure per worker, cleared once it gets ready
+        self._failures: Dict[int, str] = {}
+        for worker_id in range(num_workers):
+            self._start_worker(worker_id)
+
+        logger.info(f"Started {num_workers} inference workers with {self.num_slots} frame slots")
+
+    def submit(self, source: str, frame: np.ndarray, regions=None,
+               timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Queue a frame for inference.
+
+        Args:
+            source (str): Source the frame belongs to, results are ordered per source
+            frame (numpy.ndarray): BGR frame, must fit in a slot
+            regions (SourceRegions, optional): Regions to crop to and exclusion zones to filter by
+            timeout (float, optional): Seconds to wait for a free slot, None waits forever
+
+        Returns:
+            int: Sequence number of the frame, or None if no slot freed up in
+                time or no worker is running
+        """
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of shape {frame.shape} does not fit in a {self.slot_bytes} byte slot")
+
+        slot = self._acquire_slot(timeout)
+        if slot is None:
+            return None
+
+        with self._lock:
+            if self._closed:
+                return None
+
+            # Least busy running worker gets the frame
+            running = [i for i, worker in enumerate(self._workers) if worker.is_alive()]
+            if not running:
+                self._free_slots.put(slot)
+                return None
+            worker_id = min(running, key=lambda i: len(self._in_flight[i]))
+
+            self._ring[slot, :frame.nbytes] = frame.reshape(-1)
+            self._slot_shapes[slot] = frame.shape
+            seq = self._next_seq[source]
+            self._next_seq[source] += 1
+            self._in_flight[worker_id][(source, seq)] = slot
+            self._task_queues[worker_id].put((source, seq, slot, frame.shape, regions))
+        return seq
+
+    def results(self, source: str, timeout: float = 0.0) -> List[Tuple[int, np.ndarray, List]]:
+        """
+        Collect finished frames for a source in submission order.
+
+        Args:
+            source (str): Source to collect results for
+            timeout (float): Seconds to wait for the next in-order result
+
+        Returns:
+            list: (seq, annotated frame, detections) tuples, possibly empty
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while not self._closed:
+                self._drain(block=False)
+                ready = self._pop_ready(source)
+                remaining = deadline - time.monotonic()
+                if ready or remaining <= 0:
+                    return ready
+                # Wake up regularly to notice dead workers
+                self._drain(block=True, timeout=min(remaining, 0.1))
+            return []
+
+    def wait_ready(self, timeout: float) -> None:
+        """
+        Block until every worker has loaded and warmed its model.
+
+        Raises:
+            RuntimeError: If a worker failed to load the model or did not get ready in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            # Only hold the lock while draining so discard() and close() are not kept waiting
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Inference pool closed before it was ready")
+                self._drain(block=False)
+                if all(self._worker_ready):
+                    return
+                if self._failures:
+                    worker_id, error = next(iter(self._failures.items()))
+                    raise RuntimeError(f"Inference worker {worker_id} failed to load the model: {error}")
+                waiting = self._worker_ready.count(False)
+
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"{waiting} inference workers not ready after {timeout}s")
+            time.sleep(0.05)
+
+    @property
+    def ready_workers(self) -> int:
+        """Number of workers that have loaded their model and are still running"""
+        return sum(1 for ready, worker in zip(self._worker_ready, self._workers)
+                   if ready and worker.is_alive())
+
+    def discard(self, source: str) -> None:
+        """Drop buffered results for a source, e.g. after switching away from it"""
+        with self._lock:
+            self._pending.pop(source, None)
+            self._expected_seq[source] = self._next_seq[source]
+
+    def close(self) -> None:
+        """Stop the workers and release the shared memory block"""
+        # Waits for any results() or submit() still reading the ring
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+
+            for tasks in self._task_queues:
+                tasks.put(None)
+            for worker in self._workers:
+                worker.join(timeout=5)
+                if worker.is_alive():
+                    worker.terminate()
+
+            del self._ring
+            self._shm.close()
+            self._shm.unlink()
+
+    def _start_worker(self, worker_id: int) -> None:
+        tasks = self._ctx.Queue()
+        worker = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self._shm.name, self.num_slots, self.slot_bytes,
+                  tasks, self._results) + self._model_args,
+            daemon=True)
+        worker.start()
+        self._workers[worker_id] = worker
+        self._task_queues[worker_id] = tasks
+        self._in_flight[worker_id] = {}
+        self._worker_ready[worker_id] = False
+        self._restart_at[worker_id] = None
+
+    def _check_workers(self) -> None:
+        """Reclaim the frames of dead workers and restart them. Caller holds the lock."""
+        now = time.monotonic()
+        for worker_id, worker in enumerate(self._workers):
+            if worker.is_alive():
+                continue
+
+            if self._restart_at[worker_id] is not None:
+                if now >= self._restart_at[worker_id]:
+                    self._start_worker(worker_id)
+                continue
+
+            lost = self._in_flight[worker_id]
+            self._in_flight[worker_id] = {}
+            for (source, seq), slot in lost.items():
+                self._slot_shapes.pop(slot, None)
+                self._free_slots.put(slot)
+                self._store(source, seq, None)
+
+            if not self._worker_ready[worker_id]:
+                self._failures.setdefault(
+                    worker_id, f"exited with code {worker.exitcode} before it was ready")
+            self._worker_ready[worker_id] = False
+
+            # Back off so a model that keeps failing to load does not spin
+            delay = self._backoff[worker_id]
+            self._backoff[worker_id] = min(delay * 2, self.MAX_RESTART_BACKOFF)
+            self._restart_at[worker_id] = now + delay
+            logger.error(f"Inference worker {worker_id} exited with code {worker.exitcode}, "
+                         f"dropped {len(lost)} frames, restarting in {delay:.0f}s")
+
+    def _acquire_slot(self, timeout: Optional[float]) -> Optional[int]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Finished results hold slots until drained, so reclaim them first
+            with self._lock:
+                if self._closed:
+                    return None
+                self._drain(block=False)
+            try:
+                return self._free_slots.get(timeout=0.01)
+            except queue.Empty:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return None
+
+    def _drain(self, block: bool, timeout: Optional[float] = None) -> None:
+        """Move finished results off the queue and give their slots back. Caller holds the lock."""
+        while True:
+            try:
+                if block:
+                    message = self._results.get(timeout=timeout)
+                    block = False
+                else:
+                    message = self._results.get_nowait()
+            except queue.Empty:
+                # Only once the queue is empty, so a worker's last messages are not mistaken for losses
+                self._check_workers()
+                return
+
+            kind, worker_id, payload = message
+            if kind == 'error':
+                logger.error(f"Inference worker {worker_id} failed to load the model: {payload}")
+                self._failures[worker_id] = payload
+                continue
+            if kind == 'ready':
+                self._worker_ready[worker_id] = True
+                self._backoff[worker_id] = self.RESTART_BACKOFF
+                self._failures.pop(worker_id, None)
+                continue
+
+            source, seq, slot, detections = payload
+
+            # Frames of a worker already declared dead were reclaimed
+            if self._in_flight[worker_id].pop((source, seq), None) is None:
+                continue
+
+            shape = self._slot_shapes.pop(slot)
+            frame = self._ring[slot, :int(np.prod(shape))].reshape(shape).copy()
+            self._free_slots.put(slot)
+            self._store(source, seq, (frame, detections))
+
+    def _store(self, source: str, seq: int, result) -> None:
+        """Buffer a result until its turn. Caller holds the lock."""
+        # Results for discarded sequence numbers are dropped
+        if seq < self._expected_seq[source]:
+            return
+
+        pending = self._pending[source]
+        pending[seq] = result
+
+        # A source nobody polls must not hold frames forever
+        while len(pending) > self.max_pending:
+            oldest = min(pending)
+            del pending[oldest]
+            self._expected_seq[source] = max(self._expected_seq[source], oldest + 1)
+
+    def _pop_ready(self, source: str) -> List[Tuple[int, np.ndarray, List]]:
+        ready = []
+        pending = self._pending[source]
+        while self._expected_seq[source] in pending:
+            seq = self._expected_seq[source]
+            result = pending.pop(seq)
+            self._expected_seq[source] += 1
+            if result is not None:
+                frame, detections = result
+                ready.append((seq, frame, detections))
+        return ready
@@ -1,16 +1,31 @@
+import time
+_process_start = time.monotonic()
+
 from flask import Flask, render_template, Response, request, jsonify
-import cv2
 import threading
-import time
-import numpy as np
-from detection import WildlifeDetector
-from alert import EmailAlertSystem
+import logging
+from config import inference_settings, region_settings
+from regions import RegionStore
+
+# cv2, numpy, the detector and the email stack are imported lazily so the
+# HTTP server can answer before the model is loaded
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger('wildlife_server')
 
 app = Flask(__name__)
 
-# Initialize components
-detector = WildlifeDetector()
-alert_system = EmailAlertSystem()
+# Components are created by load_components() in the background
+detector = None
+alert_system = None
+inference_pool = None
+model_ready = threading.Event()
+startup_error = None
+startup_timings = {}
+region_store = RegionStore(region_settings.REGIONS_PATH)
 
 # Global variables with proper initialization
 current_frame = None
@@ -24,15 +39,134 @@ detection_results = []
 
 def cleanup_resources():
     """Safely release camera and other resources"""
-    global cap
+    global cap, inference_pool
     stop_event.set()
     if cap is not None:
         cap.release()
         cap = None
+    if inference_pool is not None:
+        inference_pool.close()
+        inference_pool = None
+
+def _timed_phase(name, func):
+    """Run one startup phase and record how long it took"""
+    started = time.monotonic()
+    result = func()
+    startup_timings[name] = round(time.monotonic() - started, 3)
+    logger.info(f"Startup phase '{name}' took {startup_timings[name]:.3f}s")
+    return result
+
+def _load_detector():
+    if inference_settings.WORKERS > 0:
+        from inference_pool import InferencePool
+        return InferencePool(
+            model_path=inference_settings.MODEL_PATH,
+            class_mapping_path=inference_settings.CLASS_MAPPING_PATH,
+            num_workers=inference_settings.WORKERS,
+            num_slots=inference_settings.RING_SLOTS,
+            max_frame_size=(inference_settings.MAX_FRAME_WIDTH, inference_settings.MAX_FRAME_HEIGHT),
+            device=inference_settings.DEVICE
+        )
+    
+    from detection import WildlifeDetector
+    return WildlifeDetector()
+
+def _warm_up():
+    """Push a blank frame through the model so the first real frame is not slow"""
+    # Each worker warms its own session before reporting ready
+    if inference_pool is not None:
+        inference_pool.wait_ready(timeout=inference_settings.WORKER_STARTUP_TIMEOUT)
+        return
+    
+    import numpy as np
+    detector.detect(np.zeros((480, 640, 3), dtype=np.uint8))
+
+def load_components():
+    """Background startup: import heavy modules, load and warm the model"""
+    global detector, inference_pool, startup_error
+    
+    try:
+        _timed_phase('import_cv2', lambda: __import__('cv2'))
+        loaded = _timed_phase('load_model', _load_detector)
+        if inference_settings.WORKERS > 0:
+            inference_pool = loaded
+        else:
+            detector = loaded
+        _timed_phase('warm_up', _warm_up)
+        
+        model_ready.set()
+        logger.info(f"Model ready {time.monotonic() - _process_start:.3f}s after launch")
+    except Exception as e:
+        startup_error = str(e)
+        logger.error(f"Failed to load detection model: {e}")
+        if inference_pool is not None:
+            inference_pool.close()
+            inference_pool = None
+
+def get_alert_system():
+    """Create the email alert system on first use"""
+    global alert_system
+    if alert_system is None:
+        from alert import EmailAlertSystem
+        alert_system = EmailAlertSystem()
+    return alert_system
+
+def handle_detections(frame, detections):
+    """Send alerts and update the detection history for one frame"""
+    global detection_results
+    
+    # Check for new detections and send alerts if needed
+    if detections and user_email:
+        for detection in detections:
+            if detection['confidence'] > 0.7:  # High confidence threshold for alerts
+                get_alert_system().send_alert(
+                    user_email, 
+                    f"Wildlife Detected: {detection['species']}",
+                    frame
+                )
+    
+    # Update detection history - limit to most recent 20 entries
+    for detection in detections:
+        detection_results.append({
+            'species': detection['species'],
+            'confidence': detection['confidence'],
+            'timestamp': time.time() * 1000  # Milliseconds timestamp
+        })
+    detection_results = detection_results[-20:]
+
+def show_startup_error():
+    """Put an error frame on the feed when the model failed to load"""
+    global current_frame
+    try:
+        import cv2
+        import numpy as np
+    except ImportError as e:
+        logger.error(f"Cannot render startup error frame: {e}")
+        return
+    
+    error_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(error_frame, "Detection model failed to load", (50, 240), 
+              cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+    cv2.putText(error_frame, "See /readyz for details", (50, 280), 
+              cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 1)
+    with frame_lock:
+        current_frame = error_frame
 
 def detection_loop():
     """Main detection thread that processes frames and detects wildlife"""
-    global current_frame, cap, detection_results
+    global current_frame, cap
+    
+    # Nothing to process until the model is loaded
+    error_shown = False
+    while not model_ready.wait(timeout=0.5):
+        if stop_event.is_set():
+            return
+        if startup_error and not error_shown:
+            show_startup_error()
+            error_shown = True
+    
+    import cv2
+    import numpy as np
     
     while not stop_event.is_set():
         try:
@@ -78,35 +212,39 @@ def detection_loop():
                 cv2.putText(frame, "Select video source", (50, 240), 
                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
             
-            # Perform detection if source is active
-            if current_source:
-                detections = detector.detect(frame)
-                
-                # Check for new detections and send alerts if needed
-                if detections and user_email:
-                    for detection in detections:
-                        if detection['confidence'] > 0.7:  # High confidence threshold for alerts
-                            alert_system.send_alert(
-                                user_email, 
-                                f"Wildlife Detected: {detection['species']}",
-                                frame
-                            )
+            # Hand the frame to the worker pool and publish whatever came back in order
+            if current_source and inference_pool is not None:
+                max_width, max_height = inference_pool.max_frame_size
+                height, width = frame.shape[:2]
+                if width > max_width or height > max_height:
+                    # Scale oversized frames down to fit a shared-memory slot
+                    scale = min(max_width / width, max_height / height)
+                    frame = cv2.resize(frame, (int(width * scale), int(height * scale)),
+                                       interpolation=cv2.INTER_AREA)
                 
-                # Update detection history - limit to most recent 20 entries
-                for detection in detections:
-                    detection_results.append({
-                        'species': detection['species'],
-                        'confidence': detection['confidence'],
-                        'timestamp': time.time() * 1000  # Milliseconds timestamp
-                    })
-                detection_results = detection_results[-20:]
+                regions = region_store.get(current_source)
+                inference_pool.submit(current_source, frame, regions, timeout=0.1)  # Drops the frame when all slots are busy
+                for _, annotated, detections in inference_pool.results(current_source):
+                    handle_detections(annotated, detections)
+                    with frame_lock:
+                        current_frame = annotated
+            else:
+                # Perform detection if source is active
+                if current_source:
+                    # Only the regions of interest go through the network
+                    regions = region_store.get(current_source)
+                    crop, offset = regions.crop(frame)
+                    detections = detector.detect(crop)
+                    detections = regions.map_detections(
+                        detections, offset, crop.shape[1::-1], frame.shape[1::-1], normalized=True)
+                    handle_detections(frame, detections)
+                    
+                    # Draw bounding boxes and labels
+                    frame = detector.draw_detections(frame, detections)
                 
-                # Draw bounding boxes and labels
-                frame = detector.draw_detections(frame, detections)
-            
-            # Update shared frame with thread safety
-            with frame_lock:
-                current_frame = frame.copy()
+                # Update shared frame with thread safety
+                with frame_lock:
+                    current_frame = frame.copy()
                 
             # Avoid high CPU usage
             time.sleep(0.03)  # ~30 FPS max
@@ -124,6 +262,7 @@ def index():
 def video_feed():
     """Stream video frames as MJPEG"""
     def generate():
+        import cv2
         while True:
             with frame_lock:
                 if current_frame is not None:
@@ -137,6 +276,30 @@ def video_feed():
     
     return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/healthz')
+def healthz():
+    """Liveness: the HTTP server is up"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: the model is loaded and a video source is open"""
+    capture = cap
+    source_open = capture is not None and capture.isOpened()
+    # In worker-pool mode at least one worker has to be up
+    pool = inference_pool
+    model_loaded = model_ready.is_set() and (pool is None or pool.ready_workers > 0)
+    ready = model_loaded and source_open
+    body = {
+        'ready': ready,
+        'model_loaded': model_loaded,
+        'source_open': source_open,
+        'startup_timings': startup_timings
+    }
+    if startup_error:
+        body['error'] = startup_error
+    return jsonify(body), 200 if ready else 503
+
 @app.route('/set_source', methods=['POST'])
 def set_source():
     """Handle changing the video source"""
@@ -149,6 +312,8 @@ def set_source():
     if cap:
         cap.release()
         cap = None
+    if inference_pool is not None and current_source:
+        inference_pool.discard(current_source)
     
     # Set new source
     if new_source in ['webcam', 'video']:
@@ -176,6 +341,29 @@ def set_email():
     
     return jsonify({'success': False, 'error': 'Invalid email format'})
 
+@app.route('/regions', methods=['GET'])
+def get_regions():
+    """Return the regions of interest and exclusion zones for every source"""
+    return jsonify({'regions': region_store.to_dict()})
+
+@app.route('/set_regions', methods=['POST'])
+def set_regions():
+    """Save regions of interest and exclusion zones for a source"""
+    data = request.json
+    source = data.get('source')
+    
+    if source not in ['webcam', 'video']:
+        return jsonify({'success': False, 'error': 'Invalid source type'})
+    
+    try:
+        regions = region_store.set(source, data.get('include'), data.get('exclude'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)})
+    except OSError as e:
+        return jsonify({'success': False, 'error': f'Could not save regions: {e}'})
+    
+    return jsonify({'success': True, 'regions': regions.to_dict()})
+
 @app.route('/detections', methods=['GET'])
 def get_detections():
     """Return recent detections as JSON"""
@@ -188,12 +376,18 @@ def handle_error(e):
 
 if __name__ == '__main__':
     try:
+        # Load the model in the background so the server answers right away
+        loader_thread = threading.Thread(target=load_components)
+        loader_thread.daemon = True
+        loader_thread.start()
+        
         # Start detection thread
         detection_thread = threading.Thread(target=detection_loop)
         detection_thread.daemon = True
         detection_thread.start()
         
         # Run the Flask app
+        logger.info(f"HTTP server starting {time.monotonic() - _process_start:.3f}s after launch")
         app.run(host='0.0.0.0', port=5000, threaded=True)
     finally:
         # Ensure cleanup happens when app exits
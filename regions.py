@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+logger = logging.getLogger('wildlife_regions')
+
+
+def _point_in_polygon(x, y, polygon):
+    """Ray casting test; polygon is a list of (x, y) points"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i]
+        xj, yj = polygon[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _polygon_area(polygon):
+    """Shoelace formula"""
+    area = 0.0
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        area += (polygon[j][0] + polygon[i][0]) * (polygon[j][1] - polygon[i][1])
+        j = i
+    return abs(area) / 2
+
+
+def _validate_polygons(polygons, name):
+    if not isinstance(polygons, list):
+        raise ValueError(f"'{name}' must be a list of polygons")
+
+    validated = []
+    for polygon in polygons:
+        if not isinstance(polygon, list) or len(polygon) < 3:
+            raise ValueError(f"Each polygon in '{name}' needs at least 3 points")
+        points = []
+        for point in polygon:
+            try:
+                if len(point) != 2:
+                    raise ValueError
+                x, y = float(point[0]), float(point[1])
+            except (TypeError, ValueError, IndexError, KeyError):
+                raise ValueError(f"Invalid point {point!r} in '{name}', expected [x, y]")
+            if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+                raise ValueError(f"Point {point!r} in '{name}' is outside the 0-1 range")
+            points.append([x, y])
+        if _polygon_area(points) == 0:
+            raise ValueError(f"Polygon {polygon!r} in '{name}' has zero area")
+        validated.append(points)
+    return validated
+
+
+class SourceRegions:
+    """
+    Regions of interest and exclusion zones for one video source.
+
+    Polygons use coordinates normalised to 0-1 of the frame size, so they
+    survive resolution changes. With no regions of interest the whole frame
+    is processed.
+    """
+
+    def __init__(self, include=None, exclude=None):
+        self.include = _validate_polygons(include or [], 'include')
+        self.exclude = _validate_polygons(exclude or [], 'exclude')
+
+    def crop_rect(self, width, height):
+        """Pixel bounding rectangle (x1, y1, x2, y2) of the regions of interest"""
+        if not self.include:
+            return 0, 0, width, height
+
+        xs = [x for polygon in self.include for x, _ in polygon]
+        ys = [y for polygon in self.include for _, y in polygon]
+        x1 = min(int(min(xs) * width), width - 1)
+        y1 = min(int(min(ys) * height), height - 1)
+
+        # Keep at least one pixel so a thin region still crops to itself
+        x2 = min(max(int(round(max(xs) * width)), x1 + 1), width)
+        y2 = min(max(int(round(max(ys) * height)), y1 + 1), height)
+        return x1, y1, x2, y2
+
+    def crop(self, frame):
+        """
+        Crop a frame to the regions of interest.
+
+        Returns:
+            tuple: (cropped view of the frame, (x, y) offset of the crop)
+        """
+        height, width = frame.shape[:2]
+        x1, y1, x2, y2 = self.crop_rect(width, height)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def is_excluded(self, x, y, width, height):
+        """Check whether a pixel position falls in an exclusion zone"""
+        nx, ny = x / width, y / height
+        return any(_point_in_polygon(nx, ny, polygon) for polygon in self.exclude)
+
+    def map_detections(self, detections, offset, crop_size, frame_size, normalized=False):
+        """
+        Map detections made on a crop back to full-frame coordinates and drop
+        those whose centre lies in an exclusion zone.
+
+        Args:
+            detections (list): Detection dicts with a 'box' entry
+            offset (tuple): (x, y) offset of the crop in the frame
+            crop_size (tuple): (width, height) of the crop
+            frame_size (tuple): (width, height) of the full frame
+            normalized (bool): Boxes are normalised (x, y, w, h) as returned by
+                WildlifeDetector instead of pixel (x1, y1, x2, y2) as returned by YOLOv9
+
+        Returns:
+            list: New detection dicts with full-frame boxes
+        """
+        x0, y0 = offset
+        crop_width, crop_height = crop_size
+        width, height = frame_size
+
+        mapped = []
+        for det in detections:
+            if normalized:
+                x, y, w, h = det['box']
+                left, top = x * crop_width + x0, y * crop_height + y0
+                box_width, box_height = w * crop_width, h * crop_height
+                box = [left / width, top / height, box_width / width, box_height / height]
+                centre = (left + box_width / 2, top + box_height / 2)
+            else:
+                x1, y1, x2, y2 = det['box']
+                box = [x1 + x0, y1 + y0, x2 + x0, y2 + y0]
+                centre = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+
+            if self.is_excluded(centre[0], centre[1], width, height):
+                continue
+            mapped.append(dict(det, box=box))
+        return mapped
+
+    def to_dict(self):
+        return {'include': self.include, 'exclude': self.exclude}
+
+
+class RegionStore:
+    """
+    Per-source regions persisted to a JSON file.
+    Thread safe; every update is written straight back to disk.
+    """
+
+    def __init__(self, path="regions.json"):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.regions = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            for source, config in data.items():
+                self.regions[source] = SourceRegions(config.get('include'), config.get('exclude'))
+            logger.info(f"Loaded regions for {len(self.regions)} sources from {self.path}")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Failed to load regions from {self.path}: {e}")
+
+    def _save(self, regions):
+        """Write atomically so a crash never leaves a truncated file. Caller holds the lock."""
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({source: r.to_dict() for source, r in regions.items()}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, source):
+        """Regions for a source; an empty SourceRegions processes the whole frame"""
+        with self.lock:
+            return self.regions.get(source) or SourceRegions()
+
+    def set(self, source, include=None, exclude=None):
+        """
+        Replace the regions for a source and persist them.
+
+        Raises:
+            ValueError: If a polygon is malformed
+            OSError: If the file cannot be written; the old regions stay in use
+        """
+        regions = SourceRegions(include, exclude)
+        with self.lock:
+            updated = dict(self.regions)
+            updated[source] = regions
+            self._save(updated)
+            self.regions = updated
+        return regions
+
+    def to_dict(self):
+        with self.lock:
+            return self._to_dict()
+
+    def _to_dict(self):
+        return {source: regions.to_dict() for source, regions in self.regions.items()}
@@ -0,0 +1,45 @@
+"""
+Stand-in for yolov9.YOLOv9 used by the inference pool tests.
+
+The model file holds the behaviour: 'ok', 'broken' (fails to load),
+'slow' (0.5s per frame), 'slowload' (3s to load), 'crash:N' (process exits on a frame filled with N)
+or 'drawfail:N' (drawing raises on a frame filled with N).
+"""
+import os
+import time
+
+import numpy as np
+
+
+class YOLOv9:
+    def __init__(self, model_path, class_mapping_path, device="CPU"):
+        with open(model_path) as f:
+            self.mode, _, value = f.read().strip().partition(':')
+        if self.mode == 'broken':
+            raise RuntimeError("stub model is broken")
+        if self.mode == 'slowload':
+            time.sleep(3)
+        self.trigger = int(value) if value else None
+        self.classes = ['person'] + ['class'] * 14 + ['cat']
+        self.color_palette = np.zeros((len(self.classes), 3))
+        self.image_width, self.image_height = 640, 480
+
+    def is_animal(self, class_id):
+        return class_id == 15
+
+    def detect(self, img):
+        value = int(img[0, 0, 0])
+        if self.mode == 'crash' and value == self.trigger:
+            os._exit(3)
+        if self.mode == 'slow':
+            time.sleep(0.5)
+        return [
+            {'class_index': 15, 'class_name': 'cat', 'confidence': value / 255,
+             'box': np.array([0, 0, 2, 2])},
+            {'class_index': 0, 'class_name': 'person', 'confidence': 0.9,
+             'box': np.array([0, 0, 2, 2])},
+        ]
+
+    def draw_detections(self, img, detections):
+        if self.mode == 'drawfail' and int(img[0, 0, 0]) == self.trigger:
+            raise RuntimeError("stub drawing failed")
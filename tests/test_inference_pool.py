@@ -0,0 +1,160 @@
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from inference_pool import InferencePool
+
+STUBS = Path(__file__).parent / 'stubs'
+
+
+@pytest.fixture
+def make_pool(tmp_path, monkeypatch):
+    """Build pools whose workers import the stub yolov9 module"""
+    monkeypatch.syspath_prepend(str(STUBS))
+    pools = []
+
+    def make(mode='ok', wait=True, **kwargs):
+        model_file = tmp_path / f"model{len(pools)}.txt"
+        model_file.write_text(mode)
+        kwargs.setdefault('num_workers', 2)
+        kwargs.setdefault('max_frame_size', (16, 16))
+        pool = InferencePool(str(model_file), 'classes.yaml', **kwargs)
+        pools.append(pool)
+        if wait:
+            pool.wait_ready(timeout=30)
+        return pool, model_file
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def make_frame(value):
+    return np.full((8, 8, 3), value, dtype=np.uint8)
+
+
+def collect(pool, source, last_seq, timeout=15):
+    """Gather results for a source until last_seq has been delivered"""
+    got = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not (got and got[-1][0] == last_seq):
+        got += pool.results(source, timeout=0.2)
+    return got
+
+
+def wait_for(condition, timeout=15):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.1)
+
+
+def test_results_are_delivered_in_order_per_source(make_pool):
+    pool, _ = make_pool(num_workers=3)
+    for value in range(10):
+        pool.submit('a', make_frame(value))
+        pool.submit('b', make_frame(100 + value))
+
+    for source, base in (('a', 0), ('b', 100)):
+        got = collect(pool, source, 9)
+        assert [seq for seq, _, _ in got] == list(range(10))
+        for seq, frame, detections in got:
+            assert frame.shape == (8, 8, 3)
+            assert frame[0, 0, 0] == base + seq
+            # Non-animal classes are not reported
+            assert [det['species'] for det in detections] == ['cat']
+
+
+def test_submit_drops_frame_when_all_slots_are_busy(make_pool):
+    pool, _ = make_pool('slow', num_workers=1, num_slots=1)
+    assert pool.submit('a', make_frame(0)) == 0
+    assert pool.submit('a', make_frame(1), timeout=0.05) is None
+    assert [seq for seq, _, _ in collect(pool, 'a', 0)] == [0]
+
+
+def test_pending_results_are_bounded(make_pool):
+    pool, _ = make_pool(max_pending=2)
+    for value in range(5):
+        pool.submit('a', make_frame(value))
+
+    # Drain through another source so nothing is handed out for 'a'
+    wait_for(lambda: not pool.results('other') and pool._free_slots.qsize() == pool.num_slots)
+    assert len(pool._pending['a']) <= 2
+    assert [seq for seq, _, _ in pool.results('a')] == [3, 4]
+
+
+def test_discard_drops_buffered_results(make_pool):
+    pool, _ = make_pool()
+    for value in range(3):
+        pool.submit('a', make_frame(value))
+    wait_for(lambda: not pool.results('other') and pool._free_slots.qsize() == pool.num_slots)
+
+    pool.discard('a')
+    pool.submit('a', make_frame(3))
+    assert [seq for seq, _, _ in collect(pool, 'a', 3)] == [3]
+
+
+def test_failed_frame_reports_no_detections(make_pool):
+    pool, _ = make_pool('drawfail:1')
+    for value in range(3):
+        pool.submit('a', make_frame(value))
+
+    got = collect(pool, 'a', 2)
+    assert [len(detections) for _, _, detections in got] == [1, 0, 1]
+
+
+def test_dead_worker_frames_are_skipped_and_worker_restarted(make_pool):
+    pool, _ = make_pool('crash:3')
+    for value in range(6):
+        pool.submit('a', make_frame(value))
+
+    # A hard exit can also lose results the worker had not flushed yet
+    seqs = [seq for seq, _, _ in collect(pool, 'a', 5)]
+    assert 3 not in seqs
+    assert seqs == sorted(seqs) and seqs[-1] == 5
+    assert pool._free_slots.qsize() == pool.num_slots
+
+    wait_for(lambda: pool.results('other') == [] and pool.ready_workers == 2)
+
+
+def test_failing_restart_does_not_block_live_workers(make_pool):
+    pool, model_file = make_pool()
+    model_file.write_text('broken')
+    pool._workers[0].kill()
+    pool._workers[0].join()
+
+    # The restart fails but the other worker keeps delivering
+    for value in range(4):
+        pool.submit('a', make_frame(value))
+    assert [seq for seq, _, _ in collect(pool, 'a', 3)] == [0, 1, 2, 3]
+    wait_for(lambda: pool.results('other') == [] and 0 in pool._failures)
+    assert pool.ready_workers == 1
+
+    for value in range(4, 8):
+        pool.submit('a', make_frame(value))
+    assert [seq for seq, _, _ in collect(pool, 'a', 7)] == [4, 5, 6, 7]
+
+    # Once the model loads again the worker comes back
+    model_file.write_text('ok')
+    wait_for(lambda: pool.results('other') == [] and pool.ready_workers == 2)
+
+
+def test_wait_ready_raises_when_model_fails_to_load(make_pool):
+    with pytest.raises(RuntimeError, match="failed to load the model"):
+        make_pool('broken')
+
+
+def test_wait_ready_does_not_block_other_calls(make_pool):
+    pool, _ = make_pool('slowload', wait=False)
+    waiter = threading.Thread(target=pool.wait_ready, args=(30,))
+    waiter.start()
+    time.sleep(0.2)
+
+    started = time.monotonic()
+    pool.discard('a')
+    assert time.monotonic() - started < 0.5
+    assert waiter.is_alive()
+    waiter.join()
@@ -0,0 +1,125 @@
+import json
+
+import numpy as np
+import pytest
+
+from regions import RegionStore, SourceRegions, _point_in_polygon
+
+SQUARE = [[0.25, 0.25], [0.75, 0.25], [0.75, 0.75], [0.25, 0.75]]
+BOTTOM_RIGHT = [[0.5, 0.5], [1.0, 0.5], [1.0, 1.0], [0.5, 1.0]]
+
+
+def test_point_in_polygon():
+    assert _point_in_polygon(0.5, 0.5, SQUARE)
+    assert not _point_in_polygon(0.1, 0.5, SQUARE)
+    assert not _point_in_polygon(0.5, 0.9, SQUARE)
+
+    triangle = [[0, 0], [1, 0], [0, 1]]
+    assert _point_in_polygon(0.2, 0.2, triangle)
+    assert not _point_in_polygon(0.8, 0.8, triangle)
+
+
+def test_crop_rect_without_include_is_full_frame():
+    assert SourceRegions().crop_rect(640, 480) == (0, 0, 640, 480)
+
+
+def test_crop_rect_covers_all_include_polygons():
+    regions = SourceRegions(include=[SQUARE, BOTTOM_RIGHT])
+    assert regions.crop_rect(200, 100) == (50, 25, 200, 100)
+
+
+def test_crop_rect_keeps_thin_region_at_least_one_pixel():
+    sliver = [[0.5, 0.5], [0.6, 0.5], [0.6, 0.5004]]
+    assert SourceRegions(include=[sliver]).crop_rect(100, 100) == (50, 50, 60, 51)
+
+    # A region on the far edge still lies inside the frame
+    edge = [[0.5, 1.0], [0.6, 1.0], [0.6, 0.9999]]
+    assert SourceRegions(include=[edge]).crop_rect(100, 100) == (50, 99, 60, 100)
+
+
+def test_crop_returns_view_and_offset():
+    frame = np.zeros((100, 200, 3), dtype=np.uint8)
+    crop, offset = SourceRegions(include=[BOTTOM_RIGHT]).crop(frame)
+    assert crop.shape == (50, 100, 3)
+    assert offset == (100, 50)
+    assert np.shares_memory(crop, frame)
+
+
+def test_map_detections_pixel_boxes():
+    regions = SourceRegions(include=[BOTTOM_RIGHT])
+    detections = [{'species': 'cat', 'box': [0, 0, 10, 10]}]
+    mapped = regions.map_detections(detections, (100, 50), (100, 50), (200, 100))
+    assert mapped == [{'species': 'cat', 'box': [100, 50, 110, 60]}]
+    # The input is left untouched
+    assert detections[0]['box'] == [0, 0, 10, 10]
+
+
+def test_map_detections_normalized_boxes():
+    regions = SourceRegions(include=[BOTTOM_RIGHT])
+    mapped = regions.map_detections([{'box': [0.0, 0.0, 0.1, 0.1]}],
+                                    (100, 50), (100, 50), (200, 100), normalized=True)
+    assert mapped[0]['box'] == pytest.approx([0.5, 0.5, 0.05, 0.05])
+
+
+def test_map_detections_drops_detections_centred_in_exclusion():
+    regions = SourceRegions(exclude=[[[0.0, 0.0], [0.5, 0.0], [0.5, 1.0], [0.0, 1.0]]])
+    detections = [
+        {'species': 'left', 'box': [10, 10, 30, 30]},
+        {'species': 'right', 'box': [150, 10, 170, 30]},
+        # Overlaps the zone but is centred outside it
+        {'species': 'straddling', 'box': [90, 10, 130, 30]},
+    ]
+    mapped = regions.map_detections(detections, (0, 0), (200, 100), (200, 100))
+    assert [det['species'] for det in mapped] == ['right', 'straddling']
+
+
+@pytest.mark.parametrize('polygons', [
+    'not a list',
+    [[[0, 0], [1, 0]]],
+    [[{}, {}, {}]],
+    [[[0, 0, 5], [1, 0], [0, 1]]],
+    [[['x', 0], [1, 0], [0, 1]]],
+    [[[0, 0], [2, 0], [0, 1]]],
+    [[[0, 0], [0.5, 0.5], [1, 1]]],
+])
+def test_malformed_polygons_are_rejected(polygons):
+    with pytest.raises(ValueError):
+        SourceRegions(include=polygons)
+
+
+def test_store_saves_and_loads(tmp_path):
+    path = tmp_path / 'regions.json'
+    store = RegionStore(path)
+    store.set('webcam', include=[SQUARE], exclude=[BOTTOM_RIGHT])
+
+    assert json.loads(path.read_text())['webcam']['include'] == [SQUARE]
+    reloaded = RegionStore(path)
+    assert reloaded.to_dict() == store.to_dict()
+    assert reloaded.get('webcam').exclude == [BOTTOM_RIGHT]
+
+
+def test_store_unknown_source_processes_whole_frame(tmp_path):
+    regions = RegionStore(tmp_path / 'regions.json').get('video')
+    assert regions.include == [] and regions.exclude == []
+
+
+def test_store_rejects_malformed_regions_without_changes(tmp_path):
+    path = tmp_path / 'regions.json'
+    store = RegionStore(path)
+    with pytest.raises(ValueError):
+        store.set('webcam', include=[[{}, {}, {}]])
+    assert store.to_dict() == {}
+    assert not path.exists()
+
+
+def test_store_keeps_old_regions_when_save_fails(tmp_path):
+    store = RegionStore(tmp_path / 'missing' / 'regions.json')
+    with pytest.raises(OSError):
+        store.set('webcam', include=[SQUARE])
+    assert store.to_dict() == {}
+
+
+def test_store_ignores_corrupt_file(tmp_path):
+    path = tmp_path / 'regions.json'
+    path.write_text('{not json')
+    assert RegionStore(path).to_dict() == {}